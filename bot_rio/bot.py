@@ -1,5 +1,6 @@
 __all__ = ["bot"]
 
+import asyncio
 from datetime import date
 from typing import List
 
@@ -7,27 +8,61 @@ import discord
 from discord import Member, Message, TextChannel
 from discord.ext import commands
 from discord.ext.commands.context import Context
-from googlesearch import search
 from loguru import logger
 import openai
 # from trello import Board
 
+from bot_rio.concurrency import CommandRejected, CommandRunner
 from bot_rio.constants import constants
+from bot_rio.embeddings import EmbeddingIndex, search_indexes
 from bot_rio.utils import (
     add_line_to_spreadsheet,
-    build_status_from_board,
+    build_status_from_board_id,
     build_status_from_sheet,
-    get_trello_client,
     is_in_vacation,
     parse_idea,
     parse_reference,
     redis_get,
     redis_set,
+    search_stackoverflow,
     smart_split,
 )
 
 bot = commands.Bot(command_prefix=constants.COMMAND_PREFIX.value)
 openai.api_key = constants.OPENAI_API_KEY.value
+heavy_commands = CommandRunner(
+    max_concurrency=constants.HEAVY_COMMANDS_MAX_CONCURRENCY.value,
+    max_per_user=constants.HEAVY_COMMANDS_MAX_PER_USER.value,
+    max_queue=constants.HEAVY_COMMANDS_MAX_QUEUE.value,
+)
+idea_index = EmbeddingIndex(
+    "ideias",
+    constants.IDEA_SPREADSHEET_ID.value,
+    worksheet_name="Lista de ideias",
+    backend=constants.EMBEDDINGS_BACKEND.value,
+)
+reference_index = EmbeddingIndex(
+    "referencias",
+    constants.REFERENCES_SPREADSHEET_ID.value,
+    worksheet_name="Referencias",
+    backend=constants.EMBEDDINGS_BACKEND.value,
+)
+
+#########################
+#
+# Helpers
+#
+#########################
+
+
+async def add_to_index(index: EmbeddingIndex, row: List[str]):
+    # Embedding the row blocks, so it runs in the default executor. Indexing
+    # failures must not prevent the row from being catalogued
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, index.add, row)
+    except Exception as e:
+        logger.error(f"Não foi possível indexar a linha {row}: {e}")
 
 #########################
 #
@@ -127,6 +162,7 @@ async def ideia(ctx: Context):
         await ctx.send(
             f"🚀 Ideia registrada com sucesso!\n\n* Nome: {idea[0]}\n* Responsável: {idea[1]}\n* Órgão: {idea[2]}\n* Temas: {idea[3]}"
         )
+        await add_to_index(idea_index, idea)
     except Exception as e:
         logger.error(e)
         await ctx.send(f"🥲 Não foi possível catalogar a ideia! Erro: {e}")
@@ -161,6 +197,7 @@ async def ref(ctx: Context):
         await ctx.send(
             f"🚀 Referência registrada com sucesso!\n\n* Tema: {reference[0]}\n* Subtema: {reference[1]}\n* Link: {reference[2]}"
         )
+        await add_to_index(reference_index, reference)
     except Exception as e:
         logger.error(e)
         await ctx.send(f"🥲 Não foi possível catalogar a ideia! Erro: {e}")
@@ -184,14 +221,18 @@ async def ajuda(ctx: Context):
 
         # Search for the query on Google, including StackOverflow
         await ctx.send("🔍 Buscando...")
-        for url in search(f"{query} site:stackoverflow.com", tld="com", num=5, stop=5, pause=2):
-            if "stackoverflow.com" in url:
-                await ctx.send(f"🔗 {url}\n\nEspero que ajude!", mention_author=True)
-                return
+        url = await heavy_commands.run(
+            ("ajuda", query.lower()), ctx.author.id, search_stackoverflow, query)
+        if url:
+            await ctx.send(f"🔗 {url}\n\nEspero que ajude!", mention_author=True)
+            return
         await ctx.send("🙃 Não encontrei nada com o que me passou! "
                        "Tente reduzir o número de palavras ou usar outros termos!",
                        mention_author=True)
 
+    except CommandRejected as e:
+        await ctx.send(f"⏳ {e}", mention_author=True)
+        return
     except Exception as e:
         logger.error(e)
         await ctx.send(f"🥲 Não foi possível encontrar ajuda! Erro: {e}")
@@ -238,32 +279,23 @@ async def status(ctx: Context):
         await ctx.send(f"🥲 Não foi possível compreender seu pedido! Erro: {e}")
         return
 
-    try:
-        # Get Trello client
-        client = get_trello_client()
-    except Exception as e:
-        logger.error(e)
-        await ctx.send(f"🥲 Não foi possível conectar ao Trello! Erro: {e}")
-        return
-
-    try:
-        # Get the board we want
-        if query == "infra":
-            board = client.get_board(constants.TRELLO_STATUS_BOARD_INFRA.value)
-        else:
-            await ctx.send("🙃 Ainda não temos status para essa área!")
-            return
-    except Exception as e:
-        logger.error(e)
-        await ctx.send(f"🥲 Não foi possível acessar o board com ID {constants.TRELLO_STATUS_BOARD_INFRA.value}! Erro: {e}")
+    # Get the board we want
+    if query == "infra":
+        board_id = constants.TRELLO_STATUS_BOARD_INFRA.value
+    else:
+        await ctx.send("🙃 Ainda não temos status para essa área!")
         return
 
     # Build the status text
     try:
-        status_text = build_status_from_board(board)
+        status_text = await heavy_commands.run(
+            ("status", board_id), ctx.author.id, build_status_from_board_id, board_id)
+    except CommandRejected as e:
+        await ctx.send(f"⏳ {e}", mention_author=True)
+        return
     except Exception as e:
         logger.error(e)
-        await ctx.send(f"🥲 Não foi possível gerar o status do board {board.name}! Erro: {e}")
+        await ctx.send(f"🥲 Não foi possível gerar o status do board com ID {board_id}! Erro: {e}")
         return
 
     try:
@@ -290,16 +322,85 @@ async def status_bases(ctx: Context):
     await ctx.message.add_reaction("🔍")
 
     try:
-        status_text = build_status_from_sheet(
-            constants.BASES_SPREADSHEET_ID.value, constants.BASES_SHEET_NAME.value)
+        status_text = await heavy_commands.run(
+            ("status_bases",),
+            ctx.author.id,
+            build_status_from_sheet,
+            constants.BASES_SPREADSHEET_ID.value,
+            constants.BASES_SHEET_NAME.value,
+        )
         for split in smart_split(status_text, max_length=2000, separator="\n\n"):
             await ctx.send(split)
+    except CommandRejected as e:
+        await ctx.send(f"⏳ {e}", mention_author=True)
+        return
     except Exception as e:
         logger.error(e)
         await ctx.send(f"🥲 Não foi possível enviar o texto de status! Erro: {e}")
         return
 
 
+@bot.command(
+    name='buscar',
+    help='🔎 Busca ideias e referências catalogadas parecidas com a consulta'
+)
+async def buscar(ctx: Context):
+
+    try:
+        # Get the query from the message
+        query: str = ctx.message.content[len(
+            constants.COMMAND_PREFIX.value) + 1 + len('buscar'):].strip()
+        if query == "":
+            await ctx.send("🙃 Você deve fornecer uma consulta!")
+            return
+        logger.info(f"Query: {query}")
+
+        await ctx.message.add_reaction("🔍")
+        ideas, references = await heavy_commands.run(
+            ("buscar", query.lower()),
+            ctx.author.id,
+            search_indexes,
+            [idea_index, reference_index],
+            query,
+            k=constants.SEARCH_TOP_K.value,
+        )
+        if not ideas and not references:
+            await ctx.send("🙃 Ainda não há nada catalogado para buscar!")
+            return
+
+        message = f"🔎 Resultados para **{query}**\n\n"
+        if ideas:
+            message += "💡 **Ideias**\n"
+            for score, idea in ideas:
+                message += f"• {' | '.join(idea)} ({score:.2f})\n"
+            message += "\n"
+        if references:
+            message += "📋 **Referências**\n"
+            for score, reference in references:
+                message += f"• {' | '.join(reference)} ({score:.2f})\n"
+        for split in smart_split(message, max_length=2000, separator="\n"):
+            await ctx.send(split)
+
+    except CommandRejected as e:
+        await ctx.send(f"⏳ {e}", mention_author=True)
+        return
+    except Exception as e:
+        logger.error(e)
+        await ctx.send(f"🥲 Não foi possível realizar a busca! Erro: {e}")
+        return
+
+
+@bot.command(
+    name='fila',
+    help='⏳ Mostra quantos comandos pesados estão rodando e na fila'
+)
+async def fila(ctx: Context):
+    await ctx.send(
+        f"⏳ Rodando: {heavy_commands.running}/{heavy_commands.max_concurrency}\n"
+        f"🧍 Na fila: {heavy_commands.queue_depth}/{heavy_commands.max_queue}"
+    )
+
+
 @bot.command(
     name='link_tabela',
     help='🔗 Cria um link para uma tabela do BigQuery'
@@ -0,0 +1,88 @@
+import asyncio
+from collections import defaultdict
+from functools import partial
+from typing import Any, Callable, Dict, Hashable
+
+from loguru import logger
+
+
+class CommandRejected(Exception):
+    """Raised when a heavy command can't be accepted right now"""
+
+
+class CommandRunner:
+    """
+    Runs heavy (blocking) command pipelines in a thread pool.
+
+    - Identical in-flight requests (same key) are coalesced: every caller
+      awaits the same result.
+    - Each user can only have `max_per_user` pipelines running or queued.
+    - At most `max_concurrency` pipelines run at once; up to `max_queue`
+      more wait for a slot and anything beyond that is rejected.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_user: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._per_user: Dict[Hashable, int] = defaultdict(int)
+        self._semaphore: asyncio.Semaphore = None
+        self._running = 0
+        self._waiting = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of accepted pipelines that haven't started running yet"""
+        return self._waiting
+
+    @property
+    def running(self) -> int:
+        """Number of pipelines currently running"""
+        return self._running
+
+    async def run(self, key: Hashable, user_id: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `func(*args, **kwargs)` on behalf of `user_id`, or joins the
+        in-flight run with the same `key`.
+        """
+        if key in self._in_flight:
+            logger.info(f"Joining in-flight command {key}")
+            return await asyncio.shield(self._in_flight[key])
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            raise CommandRejected(
+                "Você já tem um comando em andamento, aguarde ele terminar!")
+        if self._running + self._waiting >= self.max_concurrency + self.max_queue:
+            raise CommandRejected(
+                "Estou muito ocupado agora, tente novamente em instantes!")
+        # Reserve the slots right away, so a burst within a single loop tick
+        # can't get past the limits before any task has started
+        self._per_user[user_id] += 1
+        self._waiting += 1
+        logger.info(f"Command queue depth: {self._waiting}")
+        future = asyncio.ensure_future(
+            self._execute(user_id, partial(func, *args, **kwargs)))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _execute(self, user_id: Hashable, func: Callable) -> Any:
+        """Waits for a free slot and runs `func` in the default executor"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._waiting -= 1
+            self._running += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, func)
+            finally:
+                self._running -= 1
+                self._semaphore.release()
+        finally:
+            self._per_user[user_id] -= 1
+            if self._per_user[user_id] <= 0:
+                del self._per_user[user_id]
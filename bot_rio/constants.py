@@ -17,6 +17,7 @@ class constants (Enum):
     BOT_RIO_API_URL = nonull_getenv('BOT_RIO_API_URL')
     BOT_RIO_API_TOKEN = nonull_getenv('BOT_RIO_API_TOKEN')
     DISCORD_TOKEN = nonull_getenv('DISCORD_TOKEN')
+    EMBEDDINGS_BACKEND = getenv('EMBEDDINGS_BACKEND', 'openai')
     GCLOUD_CREDENTIALS = nonull_getenv('GCLOUD_CREDENTIALS')
     GERAL_CHANNEL = nonull_getenv('GERAL_CHANNEL')
     IDEA_CHANNEL = nonull_getenv('IDEA_CHANNEL')
@@ -47,9 +48,15 @@ class constants (Enum):
     DEFAULT_ISSUE_BODY = '''Issue criada automaticamente pelo Bot.rio!
 
     Favor preencher detalhes!'''
+    HEAVY_COMMANDS_MAX_CONCURRENCY = 2
+    HEAVY_COMMANDS_MAX_PER_USER = 1
+    HEAVY_COMMANDS_MAX_QUEUE = 10
+    SEARCH_TOP_K = 3
 
     # OpenAI
     COMPLETIONS_MODEL = "text-davinci-003"
+    EMBEDDINGS_MODEL = "text-embedding-ada-002"
+    EMBEDDINGS_BATCH_SIZE = 500
 
     # Credentials
     GSPREAD_SCOPE = [
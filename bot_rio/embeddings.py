@@ -0,0 +1,270 @@
+import hashlib
+import re
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
+import unicodedata
+
+import numpy as np
+import openai
+
+from bot_rio.constants import constants
+from bot_rio.utils import (
+    get_spreadsheet_rows,
+    redis_hdel,
+    redis_hgetall,
+    redis_hset,
+)
+
+
+def get_embedding_function(backend: str) -> Callable[[List[str]], np.ndarray]:
+    """Gets the embedding function for the given backend"""
+    if backend == "openai":
+        return openai_embeddings
+    elif backend == "hash":
+        return hash_embeddings
+    raise ValueError(f"Backend de embeddings desconhecido: {backend}")
+
+
+def hash_embeddings(texts: List[str], dimension: int = 256) -> np.ndarray:
+    """
+    Deterministic local stand-in for OpenAI embeddings, using feature hashing
+    of words and word pairs. Needs no network access, so it's useful offline.
+    """
+    embeddings = np.zeros((len(texts), dimension), dtype=np.float32)
+    for i, text in enumerate(texts):
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.md5(feature.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            embeddings[i, index] += sign
+    return embeddings
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """Normalizes embeddings to unit length, so dot products are cosines"""
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def openai_embeddings(texts: List[str]) -> np.ndarray:
+    """
+    Gets embeddings for a list of texts from OpenAI, in batches that fit
+    within the API limits
+    """
+    batch_size = constants.EMBEDDINGS_BATCH_SIZE.value
+    embeddings = []
+    for i in range(0, len(texts), batch_size):
+        response = openai.Embedding.create(
+            input=texts[i:i + batch_size], model=constants.EMBEDDINGS_MODEL.value)
+        data = sorted(response["data"], key=lambda item: item["index"])
+        embeddings.extend(item["embedding"] for item in data)
+    return np.array(embeddings, dtype=np.float32)
+
+
+def row_to_text(row: List[str]) -> str:
+    """Joins a spreadsheet row into a single text to be embedded"""
+    return " ".join(cell.strip() for cell in row if cell.strip())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases, strips accents and splits a text into words"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"\w+", text)
+
+
+def search_indexes(
+    indexes: List["EmbeddingIndex"],
+    query: str,
+    k: int = 5,
+) -> List[List[Tuple[float, List[str]]]]:
+    """
+    Syncs each index with its spreadsheet and searches it, embedding the
+    query only once
+    """
+    if not indexes:
+        return []
+    query_embedding = normalize(indexes[0].embed([query]))[0]
+    results = []
+    for index in indexes:
+        index.sync()
+        results.append(index.search_vector(query_embedding, k=k))
+    return results
+
+
+class EmbeddingIndex:
+    """
+    Embedding index over the rows of a spreadsheet.
+
+    Embeddings are kept as a normalized NumPy matrix (one row per spreadsheet
+    row). Each row's embedding is also cached in its own field of a Redis hash,
+    so it's only computed once. Embedding and Redis calls are made outside the
+    lock, which only guards the in-memory state.
+
+    The spreadsheet is the source of truth: `sync` drops rows (and their cached
+    embeddings) that are no longer in it, except for rows appended through
+    `add` after the spreadsheet was read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        spreadsheet_id: str,
+        worksheet_name: str = None,
+        backend: str = "openai",
+    ):
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheet_name = worksheet_name
+        self.redis_key = (
+            f"bot_rio__embeddings__{name}__{backend}__{constants.EMBEDDINGS_MODEL.value}")
+        self.embed = get_embedding_function(backend)
+        self.rows: List[List[str]] = []
+        self._positions: Dict[str, int] = {}
+        self._buffer: np.ndarray = None
+        self._cache: Dict[str, np.ndarray] = None
+        # Texts appended through `add`, with the sequence number of the append
+        self._pending: Dict[str, int] = {}
+        self._sequence = 0
+        self._lock = Lock()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized embeddings, one per row"""
+        if self._buffer is None:
+            return None
+        return self._buffer[:len(self.rows)]
+
+    def add(self, row: List[str]):
+        """Embeds a freshly appended row and adds it to the index"""
+        text = row_to_text(row)
+        with self._lock:
+            if text in self._positions:
+                return
+            self._sequence += 1
+            self._pending[text] = self._sequence
+        embedding = self._embed_missing([text])[text]
+        with self._lock:
+            if text in self._positions:
+                return
+            self._append(row, embedding)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, List[str]]]:
+        """Returns the `k` rows most similar to the query, with their scores"""
+        return self.search_vector(normalize(self.embed([query]))[0], k=k)
+
+    def search_vector(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 5,
+    ) -> List[Tuple[float, List[str]]]:
+        """
+        Returns the `k` rows most similar to a normalized query embedding,
+        with their scores. Rows with no similarity at all are left out.
+        """
+        if not np.any(query_embedding):
+            return []
+        with self._lock:
+            if len(self.rows) == 0:
+                return []
+            scores = self.matrix @ query_embedding
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (float(scores[i]), self.rows[i]) for i in top if scores[i] > 0]
+
+    def sync(self):
+        """
+        Rebuilds the index from the spreadsheet, only embedding rows that
+        haven't been seen before
+        """
+        with self._lock:
+            start = self._sequence
+        rows = get_spreadsheet_rows(
+            self.spreadsheet_id, self.worksheet_name)[1:]
+        rows = [row for row in rows if row_to_text(row)]
+        embeddings = self._embed_missing([row_to_text(row) for row in rows])
+        with self._lock:
+            embeddings.update(self._cache)
+            # Rows appended before the spreadsheet was read are already in it
+            self._pending = {
+                text: sequence for text, sequence in self._pending.items()
+                if sequence > start
+            }
+            merged = list({row_to_text(row): row for row in rows}.values())
+            snapshot = {row_to_text(row) for row in merged}
+            merged += [
+                row for row in self.rows
+                if row_to_text(row) in self._pending
+                and row_to_text(row) not in snapshot
+            ]
+            texts = [row_to_text(row) for row in merged]
+            stale = [
+                text for text in self._cache
+                if text not in snapshot and text not in self._pending
+            ]
+            for text in stale:
+                del self._cache[text]
+            if texts != list(self._positions):
+                self.rows = merged
+                self._positions = {text: i for i, text in enumerate(texts)}
+                self._buffer = None
+                if merged:
+                    self._buffer = np.stack(
+                        [embeddings[text] for text in texts])
+        if stale:
+            redis_hdel(self.redis_key, stale)
+
+    def _append(self, row: List[str], embedding: np.ndarray):
+        """
+        Appends a row to the matrix, doubling its capacity when needed so
+        appends are amortized constant time
+        """
+        size = len(self.rows)
+        if self._buffer is None:
+            self._buffer = np.empty((1, embedding.shape[0]), dtype=np.float32)
+        elif size == self._buffer.shape[0]:
+            buffer = np.empty(
+                (2 * size, self._buffer.shape[1]), dtype=np.float32)
+            buffer[:size] = self._buffer[:size]
+            self._buffer = buffer
+        self._buffer[size] = embedding
+        self.rows.append(row)
+        self._positions[row_to_text(row)] = size
+
+    def _embed_missing(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Embeds and caches the texts that aren't cached yet, returning the
+        embeddings of all given texts
+        """
+        self._load()
+        with self._lock:
+            found = {
+                text: self._cache[text] for text in texts if text in self._cache}
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if not missing:
+            return found
+        embeddings = normalize(self.embed(missing)).astype(np.float32)
+        redis_hset(self.redis_key, {
+            text: embedding.tobytes()
+            for text, embedding in zip(missing, embeddings)
+        })
+        with self._lock:
+            self._cache.update(zip(missing, embeddings))
+        found.update(zip(missing, embeddings))
+        return found
+
+    def _load(self):
+        """Loads cached embeddings from Redis, if they haven't been loaded yet"""
+        if self._cache is not None:
+            return
+        cache = {
+            text.decode(): np.frombuffer(embedding, dtype=np.float32)
+            for text, embedding in redis_hgetall(self.redis_key).items()
+        }
+        with self._lock:
+            if self._cache is None:
+                self._cache = cache
@@ -1,9 +1,10 @@
 import base64
 from datetime import date, datetime, timedelta
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from google.oauth2 import service_account
+from googlesearch import search
 import gspread
 import pandas as pd
 import pendulum
@@ -64,6 +65,14 @@ def build_status_from_board(board: Board) -> str:
     return status
 
 
+def build_status_from_board_id(board_id: str, client: TrelloClient = None) -> str:
+    """
+    Fetches a Trello board and builds its status string
+    """
+    board = get_trello_board(board_id, client=client)
+    return build_status_from_board(board)
+
+
 def build_status_from_sheet(spreadsheet_id: str, worksheet_name: str = None, client: gspread.Client = None) -> str:
     """
     Builds a status string from Google Sheets
@@ -142,6 +151,20 @@ def get_last_monday() -> datetime:
     return monday
 
 
+def get_spreadsheet_rows(
+    spreadsheet_id: str,
+    worksheet_name: str = None,
+    client: gspread.Client = None,
+) -> List[List[str]]:
+    """Gets all rows from a spreadsheet"""
+    if not client:
+        client = get_gspread_client()
+    sheet = client.open_by_key(spreadsheet_id)
+    if worksheet_name:
+        sheet = sheet.worksheet(worksheet_name)
+    return sheet.get_all_values()
+
+
 def get_trello_board(board_id: str, client: TrelloClient = None) -> Board:
     """Gets a Trello board"""
     if not client:
@@ -254,6 +277,27 @@ def redis_get(key: str, client: RedisPal = None):
     return client.get(key)
 
 
+def redis_hdel(key: str, fields: List[str], client: RedisPal = None):
+    """Deletes fields of a hash from Redis"""
+    if not client:
+        client = RedisPal.from_url(constants.REDIS_CONNECTION_URL.value)
+    client.hdel(key, *fields)
+
+
+def redis_hgetall(key: str, client: RedisPal = None) -> Dict[bytes, bytes]:
+    """Gets all fields of a hash from Redis, without deserializing them"""
+    if not client:
+        client = RedisPal.from_url(constants.REDIS_CONNECTION_URL.value)
+    return client.hgetall(key)
+
+
+def redis_hset(key: str, mapping: Dict[str, bytes], client: RedisPal = None):
+    """Sets fields of a hash in Redis, without serializing them"""
+    if not client:
+        client = RedisPal.from_url(constants.REDIS_CONNECTION_URL.value)
+    client.hset(key, mapping=mapping)
+
+
 def redis_set(key: str, value: str, client: RedisPal = None):
     """Sets a value in Redis"""
     if not client:
@@ -261,6 +305,16 @@ def redis_set(key: str, value: str, client: RedisPal = None):
     client.set(key, value)
 
 
+def search_stackoverflow(query: str) -> Optional[str]:
+    """
+    Searches Google for a StackOverflow answer, returning the first URL found
+    """
+    for url in search(f"{query} site:stackoverflow.com", tld="com", num=5, stop=5, pause=2):
+        if "stackoverflow.com" in url:
+            return url
+    return None
+
+
 def smart_split(
     text: str,
     max_length: int,
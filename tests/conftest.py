@@ -0,0 +1,24 @@
+import os
+
+# bot_rio.constants requires these to be set at import time
+for env in [
+    "BASES_SHEET_NAME",
+    "BASES_SPREADSHEET_ID",
+    "BOT_RIO_API_URL",
+    "BOT_RIO_API_TOKEN",
+    "DISCORD_TOKEN",
+    "GCLOUD_CREDENTIALS",
+    "GERAL_CHANNEL",
+    "IDEA_CHANNEL",
+    "IDEA_SPREADSHEET_ID",
+    "LANGUAGES_CHANNELS",
+    "OPENAI_API_KEY",
+    "REDIS_CONNECTION_URL",
+    "REFERENCES_CHANNEL",
+    "REFERENCES_SPREADSHEET_ID",
+    "STATUS_CHANNEL",
+    "TRELLO_KEY",
+    "TRELLO_STATUS_BOARD_INFRA",
+    "TRELLO_TOKEN",
+]:
+    os.environ.setdefault(env, "test")
@@ -0,0 +1,70 @@
+import asyncio
+from threading import Event
+
+import pytest
+
+from bot_rio.concurrency import CommandRejected, CommandRunner
+
+
+def test_identical_requests_are_coalesced():
+    calls = []
+
+    def pipeline(value):
+        calls.append(value)
+        return value * 2
+
+    async def main():
+        runner = CommandRunner(max_concurrency=1, max_per_user=1, max_queue=0)
+        return await asyncio.gather(*[
+            runner.run("status", user_id, pipeline, 21) for user_id in range(4)
+        ])
+
+    assert asyncio.run(main()) == [42, 42, 42, 42]
+    assert calls == [21]
+
+
+def test_per_user_limit():
+    release = Event()
+
+    async def main():
+        runner = CommandRunner(max_concurrency=2, max_per_user=1, max_queue=2)
+        first = asyncio.ensure_future(runner.run("a", "user", release.wait))
+        try:
+            await asyncio.sleep(0)
+            with pytest.raises(CommandRejected):
+                await runner.run("b", "user", release.wait)
+            # Other users are not affected
+            other = asyncio.ensure_future(
+                runner.run("c", "other", release.wait))
+            await asyncio.sleep(0)
+        finally:
+            release.set()
+        await asyncio.gather(first, other)
+        # The slot is freed once the command finishes
+        assert await runner.run("d", "user", lambda: "ok") == "ok"
+
+    asyncio.run(main())
+
+
+def test_burst_is_limited_before_tasks_start():
+    release = Event()
+
+    async def main():
+        runner = CommandRunner(max_concurrency=2, max_per_user=1, max_queue=1)
+        results = asyncio.gather(*[
+            runner.run(key, key, release.wait) for key in range(8)
+        ], return_exceptions=True)
+        try:
+            await asyncio.sleep(0.05)
+            assert runner.running == 2
+            assert runner.queue_depth == 1
+        finally:
+            release.set()
+        return await results
+
+    results = asyncio.run(main())
+    accepted = [result for result in results if result is True]
+    rejected = [
+        result for result in results if isinstance(result, CommandRejected)]
+    assert len(accepted) == 3
+    assert len(rejected) == 5
@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+
+from bot_rio import embeddings
+from bot_rio.embeddings import EmbeddingIndex, hash_embeddings, search_indexes
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    rows = [
+        ["Tema", "Subtema", "Link"],
+        ["Clima", "Chuvas", "http://a"],
+        ["Mobilidade", "Ônibus", "http://b"],
+        ["Saúde", "Vacinação", "http://c"],
+    ]
+    redis = {}
+
+    def hset(key, mapping):
+        redis.setdefault(key, {}).update(
+            {text.encode(): value for text, value in mapping.items()})
+
+    def hdel(key, fields):
+        for field in fields:
+            redis.get(key, {}).pop(field.encode(), None)
+
+    monkeypatch.setattr(
+        embeddings, "get_spreadsheet_rows", lambda *args: [list(row) for row in rows])
+    monkeypatch.setattr(
+        embeddings, "redis_hgetall", lambda key: dict(redis.get(key, {})))
+    monkeypatch.setattr(embeddings, "redis_hset", hset)
+    monkeypatch.setattr(embeddings, "redis_hdel", hdel)
+    sheet = type("Sheet", (), {})()
+    sheet.rows = rows
+    sheet.redis = redis
+    return sheet
+
+
+def make_index(calls):
+    index = EmbeddingIndex("referencias", "sheet_id", backend="hash")
+
+    def embed(texts):
+        # Embedding must never happen while holding the index lock
+        assert not index._lock.locked()
+        calls.extend(texts)
+        return hash_embeddings(texts)
+
+    index.embed = embed
+    return index
+
+
+def test_hash_embeddings_are_deterministic():
+    first = hash_embeddings(["Ônibus no Rio", "Chuvas"])
+    second = hash_embeddings(["onibus no rio", "Chuvas"])
+    assert first.shape == (2, 256)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_empty_index(sheet):
+    del sheet.rows[1:]
+    index = make_index([])
+    index.sync()
+    assert index.search("qualquer coisa") == []
+
+
+def test_search_orders_by_similarity(sheet):
+    index = make_index([])
+    index.sync()
+    results = index.search("ônibus mobilidade http", k=2)
+    assert len(results) == 2
+    assert results[0][1] == ["Mobilidade", "Ônibus", "http://b"]
+    assert results[0][0] > results[1][0]
+
+
+def test_search_leaves_out_unrelated_rows(sheet):
+    index = make_index([])
+    index.sync()
+    assert index.search("???") == []
+    assert [row for _, row in index.search("ônibus", k=3)] == [
+        ["Mobilidade", "Ônibus", "http://b"]]
+
+
+def test_search_indexes_embeds_query_once(sheet):
+    calls = []
+    indexes = [make_index(calls), make_index(calls)]
+    indexes[1].redis_key += "__other"
+    results = search_indexes(indexes, "ônibus", k=1)
+    assert calls.count("ônibus") == 1
+    assert results[0] == results[1]
+
+
+def test_rows_are_only_embedded_once(sheet):
+    calls = []
+    index = make_index(calls)
+    index.sync()
+    assert len(calls) == 3
+
+    index.add(["Educação", "Escolas", "http://d"])
+    sheet.rows.append(["Educação", "Escolas", "http://d"])
+    index.sync()
+    assert len(calls) == 4
+
+    # A fresh index reuses the embeddings cached in Redis
+    calls.clear()
+    other = make_index(calls)
+    other.sync()
+    assert calls == []
+    assert other.search("escolas", k=1)[0][1] == [
+        "Educação", "Escolas", "http://d"]
+
+
+def test_sync_drops_edited_and_deleted_rows(sheet):
+    index = make_index([])
+    index.sync()
+    sheet.rows[1] = ["Clima", "Enchentes", "http://a"]
+    del sheet.rows[2]
+    index.sync()
+    assert index.rows == [
+        ["Clima", "Enchentes", "http://a"],
+        ["Saúde", "Vacinação", "http://c"],
+    ]
+    assert index.matrix.shape[0] == 2
+    assert index.search("chuvas") == []
+    assert index.search("mobilidade onibus") == []
+    # Their cached embeddings are deleted from Redis as well
+    assert set(sheet.redis[index.redis_key]) == {
+        "Clima Enchentes http://a".encode(),
+        "Saúde Vacinação http://c".encode(),
+    }
+
+
+def test_sync_keeps_rows_added_while_reading_sheet(sheet, monkeypatch):
+    index = make_index([])
+    snapshot = [list(row) for row in sheet.rows]
+
+    def get_spreadsheet_rows(*args):
+        # The row is appended and indexed after the sheet has been read
+        sheet.rows.append(["Educação", "Escolas", "http://d"])
+        index.add(["Educação", "Escolas", "http://d"])
+        return snapshot
+
+    monkeypatch.setattr(embeddings, "get_spreadsheet_rows", get_spreadsheet_rows)
+    index.sync()
+    assert len(index.rows) == 4
+    assert index.matrix.shape[0] == 4
+    assert index.search("escolas", k=1)[0][1] == [
+        "Educação", "Escolas", "http://d"]
+
+
+def test_openai_embeddings_are_batched(monkeypatch):
+    sizes = []
+
+    def create(input, model):
+        sizes.append(len(input))
+        return {"data": [
+            {"index": i, "embedding": [float(i), 1.0]} for i in range(len(input))
+        ]}
+
+    monkeypatch.setattr(embeddings.openai.Embedding, "create", create)
+    result = embeddings.openai_embeddings(["texto"] * 1200)
+    assert sizes == [500, 500, 200]
+    assert result.shape == (1200, 2)